@@ -19,14 +19,13 @@ Restrictions:
     For more info, please refer to: http://lammps.sandia.gov/doc/read_data.html
 """
 
-from six.moves import range
-from io import open
+from io import StringIO
+from itertools import islice
 import re
-from collections import OrderedDict
 
 import numpy as np
 
-from monty.json import MSONable, MontyDecoder
+from monty.json import MSONable, MontyDecoder, MontyEncoder
 
 from pymatgen.core.structure import Molecule, Structure
 
@@ -34,6 +33,255 @@ __author__ = 'Kiran Mathew'
 __email__ = "kmathew@lbl.gov"
 __credits__ = 'Brandon Wood'
 
+# Header lines, used with match(), i.e. anchored at the line start. The
+# matched alternative is given by lastgroup:
+# "counts": number of atoms, bonds, ... or of atom types, bond types, ...
+# "box": box bounds, min and max
+_HEADER_RE = re.compile(
+    "\s*(?:(?P<counts>(?P<count>\d+)\s+(?P<name>[a-zA-Z]+(?:\s+types)?)\s*$)"
+    "|(?P<box>(?P<lo>[0-9eE\.+-]+)\s+(?P<hi>[0-9eE\.+-]+)"
+    "\s+[xyz]lo\s+[xyz]hi))")
+
+
+# read buffer size of the data file readers, large files are read in few
+# big chunks. The files are read in text mode: the decoding is done per
+# buffer and np.fromstring is no faster on bytes, so reading bytes does not
+# pay off.
+_READ_BUFFER_SIZE = 16 * 1024 * 1024
+
+
+def _get_row_fmt(data, nints=None):
+    """
+    Return the numpy.savetxt format string for the rows of a data block.
+
+    Args:
+        data (numpy.ndarray): the data block
+        nints (int): number of leading integer columns(ids, types). If not
+            set, all the columns are integers.
+
+    Returns:
+        format string, e.g. "%d %d %d %.17g %.17g %.17g %.17g" or None if the
+        data is not a 2D array
+    """
+    if not isinstance(data, np.ndarray) or data.ndim != 2:
+        return None
+    ncols = data.shape[1]
+    nints = ncols if nints is None else nints
+    return " ".join(["%d"] * nints + ["%.17g"] * (ncols - nints))
+
+
+def _fill_rows(data, nrows, nread, lines, dtype=np.float64):
+    """
+    Parse the given section lines in a single np.fromstring call and store
+    them in data, starting at row nread. data is allocated for the nrows of
+    the section when the first lines are parsed, unless they are the whole
+    section.
+
+    Returns:
+        the data array and the number of rows read so far
+
+    Raises:
+        ValueError: if the lines do not have the same number of values or
+            if a value is not a number
+    """
+    end = nread + len(lines)
+    ncols = len(lines[0].split())
+    if data is not None and ncols != data.shape[1]:
+        raise ValueError("expected {} values per line, got {}: {!r}".format(
+            data.shape[1], ncols, lines[0].strip()))
+    # the values do not fill a (rows, ncols) block as soon as one line is
+    # ragged, even if the total count matches
+    for line in lines:
+        if len(line.split()) != ncols:
+            raise ValueError(
+                "expected {} values per line, got {}: {!r}".format(
+                    ncols, len(line.split()), line.strip()))
+    rows = np.fromstring(" ".join(lines), dtype=dtype, sep=" ")
+    # np.fromstring stops at the first value that is not a number
+    if rows.size != len(lines) * ncols:
+        raise ValueError("non-numeric value in the lines {!r} to {!r}".format(
+            lines[0].strip(), lines[-1].strip()))
+    rows = rows.reshape(end - nread, ncols)
+    if data is None:
+        # the whole section in one go, no need to copy
+        if end == nrows:
+            return rows, end
+        data = np.empty((nrows, rows.shape[1]), dtype=dtype)
+    data[nread:end] = rows
+    return data, end
+
+
+def read_section(stream, nrows, chunk_size=10000, dtype=np.float64):
+    """
+    Read the body of a data file section, i.e. the next nrows non-empty
+    lines of the stream. Trailing comments are stripped and the lines are
+    parsed chunk_size at a time into an array preallocated for the whole
+    section.
+
+    Args:
+        stream (file): data file positioned right after the section header
+        nrows (int): number of rows in the section
+        chunk_size (int): number of lines parsed per np.fromstring call
+        dtype (numpy.dtype): type the values are parsed to
+
+    Returns:
+        2D numpy array of shape (nrows, number of columns)
+
+    Raises:
+        ValueError: if the lines do not have the same number of values or
+            if a value is not a number
+    """
+    data, nread = None, 0
+    while nread < nrows:
+        # never take more lines than the rows left, so that the next
+        # section is not consumed
+        chunk = list(islice(stream, min(chunk_size, nrows - nread)))
+        if not chunk:
+            break
+        # split and test in place only when needed, most lines have
+        # neither comments nor blanks
+        lines = [line.split("#", 1)[0] if "#" in line else line
+                 for line in chunk]
+        lines = [line for line in lines if line and not line.isspace()]
+        if lines:
+            data, nread = _fill_rows(data, nrows, nread, lines, dtype)
+    if data is None:
+        return np.empty((0, 0), dtype=dtype)
+    # truncated section
+    if nread < nrows:
+        return data[:nread]
+    return data
+
+
+def _read_masses(stream, nrows):
+    """
+    Read the Masses section: [[atom type, mass], ...]
+    """
+    return [[int(i), mass] for i, mass in read_section(stream, nrows).tolist()]
+
+
+def _read_atoms(stream, nrows, ncols=7):
+    """
+    Read the Atoms section, keeping the first ncols columns: atom id,
+    mol id, atom type, charge, x, y, z
+    """
+    data = read_section(stream, nrows)
+    if data.shape[1] <= ncols:
+        return data
+    # copy, so that the dropped columns(e.g. image flags) are released
+    return data[:, :ncols].copy()
+
+
+def _read_topology(stream, nrows):
+    """
+    Read a Bonds, Angles, Dihedrals or Impropers section as an int array:
+    [[id, type, atom id1, atom id2, ...], ...]. The ids are parsed as
+    integers directly.
+    """
+    return read_section(stream, nrows, dtype=np.int64)
+
+
+# force field data file section(lower case) --> count that sets its number
+# of rows and the handler that reads its body.
+# "Pair Coeffs" has one row per atom type.
+_FF_SECTIONS = {"masses": ("atom types", _read_masses),
+                "pair coeffs": ("atom types", read_section),
+                "bond coeffs": ("bond types", read_section),
+                "angle coeffs": ("angle types", read_section),
+                "dihedral coeffs": ("dihedral types", read_section),
+                "improper coeffs": ("improper types", read_section),
+                "atoms": ("atoms", _read_atoms),
+                "bonds": ("bonds", _read_topology),
+                "angles": ("angles", _read_topology),
+                "dihedrals": ("dihedrals", _read_topology),
+                "impropers": ("impropers", _read_topology)}
+# the section headers known to the readers, other sections are ignored
+_SECTION_HEADERS = frozenset(_FF_SECTIONS)
+
+
+def _iter_sections(stream, counts, box_size):
+    """
+    Read the data file header, i.e. the counts and the box bounds, and
+    yield the name of each section met. The counts and box bounds are
+    stored in counts and box_size as they are read. As in LAMMPS, the first
+    line of the file is the title and is skipped.
+
+    Args:
+        stream (file): data file
+        counts (dict): number of atoms, bonds, ..., atom types, ...:
+            {"atoms": 10, "atom types": 2, ...}
+        box_size (list): [[x_min,x_max], [y_min,y_max], [z_min,z_max]]
+
+    Yields:
+        section name in lower case, without trailing comment, e.g.
+        "masses", "pair coeffs", for the sections in _SECTION_HEADERS. The
+        stream is positioned right after the section header, so that the
+        caller can read the section body.
+
+    Raises:
+        ValueError: if the header does not set the number of rows of a
+            section, e.g. no "N atoms" line before the Atoms section
+    """
+    # bound once, outside the line loop
+    header_match = _HEADER_RE.match
+    # title, free text that must not be taken for a count or a section
+    next(stream, None)
+    for line in stream:
+        # trailing comments are allowed on any line
+        if "#" in line:
+            line = line.split("#", 1)[0]
+        stripped = line.strip()
+        if not stripped:
+            continue
+        first = stripped[0]
+        # counts and box bounds start with a number
+        if first.isdigit() or first in "+-.":
+            m = header_match(stripped)
+            if m is None:
+                continue
+            if m.lastgroup == "counts":
+                counts[" ".join(m.group("name").split())] = \
+                    int(m.group("count"))
+            else:
+                box_size.append([float(m.group("lo")), float(m.group("hi"))])
+        elif first.isalpha():
+            section = stripped.lower()
+            if section in _SECTION_HEADERS:
+                # the number of rows of the section is set in the header
+                count = _FF_SECTIONS[section][0]
+                if count not in counts:
+                    raise ValueError(
+                        "{} section found, but the number of {} is not set "
+                        "in the header".format(stripped, count))
+                yield section
+
+
+def _get_mol_ids(sizes, counts):
+    """
+    Map the items(atoms, bonds, ...) of a system assembled molecule by
+    molecule to the molecules they belong to. The items are assumed to be
+    ordered as: all the items of the first molecule of the first molecule
+    type, then of the second molecule of the first type and so on.
+
+    Args:
+        sizes (list): number of items in a molecule of each molecule type
+        counts (list): number of molecules of each molecule type
+
+    Returns:
+        molecule type, global molecule id and local item id in the
+        molecule for each item, as three int arrays
+    """
+    sizes = np.asarray(sizes, dtype=np.int64)
+    counts = np.asarray(counts, dtype=np.int64)
+    # size and type of each molecule
+    mol_sizes = np.repeat(sizes, counts)
+    mol_types = np.repeat(np.arange(len(sizes)), counts)
+    # id of the first item of each molecule
+    item_offsets = np.concatenate(([0], np.cumsum(mol_sizes)[:-1]))
+    mol_ids = np.repeat(np.arange(len(mol_sizes)), mol_sizes)
+    local_ids = np.arange(mol_sizes.sum()) - item_offsets[mol_ids]
+    return mol_types[mol_ids], mol_ids, local_ids
+
 
 class LammpsData(MSONable):
     """
@@ -50,7 +298,7 @@ class LammpsData(MSONable):
         self.natoms = len(atoms_data)
         self.natom_types = len(atomic_masses)
         self.atomic_masses = list(atomic_masses)
-        self.atoms_data = atoms_data
+        self.atoms_data = np.asarray(atoms_data, dtype=np.float64)
 
     def __str__(self):
         """
@@ -59,17 +307,27 @@ class LammpsData(MSONable):
         Returns:
             String representation of the data file
         """
-        lines = []
-        lines.append("Data file generated by pymatgen\n")
-        lines.append("{} atoms\n".format(self.natoms))
-        lines.append("{} atom types\n".format(self.natom_types))
-        lines.append("{} {} xlo xhi\n{} {} ylo yhi\n{} {} zlo zhi".format(
+        buf = StringIO()
+        self._write(buf)
+        return buf.getvalue()
+
+    def _write(self, stream):
+        """
+        Write the data file, block by block, to the stream.
+
+        Args:
+            stream (file): file or StringIO stream
+        """
+        stream.write("Data file generated by pymatgen\n\n")
+        stream.write("{} atoms\n\n".format(self.natoms))
+        stream.write("{} atom types\n\n".format(self.natom_types))
+        stream.write("{} {} xlo xhi\n{} {} ylo yhi\n{} {} zlo zhi\n".format(
             self.box_size[0][0], self.box_size[0][1],
             self.box_size[1][0], self.box_size[1][1],
             self.box_size[2][0], self.box_size[2][1]))
-        self.set_lines_from_list(lines, "Masses", self.atomic_masses)
-        self.set_lines_from_list(lines, "Atoms", self.atoms_data)
-        return '\n'.join(lines)
+        self.write_block(stream, "Masses", self.atomic_masses)
+        self.write_block(stream, "Atoms", self.atoms_data,
+                         fmt=_get_row_fmt(self.atoms_data, 3))
 
     @staticmethod
     def check_box_size(molecule, box_size):
@@ -81,32 +339,33 @@ class LammpsData(MSONable):
             molecule(Molecule)
             box_size (list): [[x_min, x_max], [y_min, y_max], [z_min, z_max]]
         """
-        box_lengths_req = [np.max(molecule.cart_coords[:, i])-np.min(molecule.cart_coords[:, i])
-                           for i in range(3)]
-        box_lengths = [min_max[1] - min_max[0] for min_max in box_size]
-        try:
-            np.testing.assert_array_less(box_lengths_req, box_lengths)
-        except AssertionError:
+        coords = molecule.cart_coords
+        box_lengths_req = np.ptp(coords, axis=0)
+        box_lengths = np.array([min_max[1] - min_max[0]
+                                for min_max in box_size])
+        if not np.all(box_lengths_req < box_lengths):
             box_size = [[0.0, np.ceil(i*1.1)] for i in box_lengths_req]
             print("Minimum required box lengths {} larger than the provided box lengths{}. "
                   "Resetting the box size to {}".format(
                 box_lengths_req, box_lengths, box_size))
-        com = molecule.center_of_mass
+        # center of mass from the same coordinates array
+        weights = [site.species_and_occu.weight for site in molecule]
+        com = np.average(coords, axis=0, weights=weights)
         new_com = [(side[1] + side[0]) / 2 for side in box_size]
-        translate_by = np.array(new_com) - np.array(com)
+        translate_by = np.array(new_com) - com
         molecule.translate_sites(range(len(molecule)), translate_by)
         return box_size
 
     def write_data_file(self, filename):
         """
-        write lammps data input file from the string representation
-        of the data.
+        write lammps data input file. The blocks are written directly to the
+        file, without building the string representation in memory.
 
         Args:
             filename (string): data file name
         """
         with open(filename, 'w') as f:
-            f.write(self.__str__())
+            self._write(f)
 
     @staticmethod
     def get_basic_system_info(structure):
@@ -117,20 +376,21 @@ class LammpsData(MSONable):
             structure (Structure)
 
         Returns:
-            number of atoms, number of atom types, box size, mapping
-            between the atom id and corresponding atomic masses
+            number of atoms, number of atom types, mapping between the atom
+            symbol and the atom type id, {atom symbol: atom type id, ...},
+            and the atomic masses, [[atom type id, atomic mass], ...]
         """
         natoms = len(structure)
         natom_types = len(structure.symbol_set)
         elements = structure.composition.elements
         elements = sorted(elements, key=lambda el: el.atomic_mass)
-        atomic_masses_dict = OrderedDict(
-            [(el.symbol, [i + 1, el.data["Atomic mass"]])
-             for i, el in enumerate(elements)])
-        return natoms, natom_types, atomic_masses_dict
+        symbol_to_typeid = {el.symbol: i + 1 for i, el in enumerate(elements)}
+        atomic_masses = [[i + 1, el.data["Atomic mass"]]
+                         for i, el in enumerate(elements)]
+        return natoms, natom_types, symbol_to_typeid, atomic_masses
 
     @staticmethod
-    def get_atoms_data(structure, atomic_masses_dict, set_charge=True):
+    def get_atoms_data(structure, symbol_to_typeid, set_charge=True):
         """
         return the atoms data:
         atom_id, molecule tag, atom_type, charge(if present else 0), x, y, z.
@@ -140,30 +400,60 @@ class LammpsData(MSONable):
 
         Args:
             structure (Structure)
-            atomic_masses_dict (dict):
-                { atom symbol : [atom_id, atomic mass], ... }
+            symbol_to_typeid (dict): { atom symbol : atom type id, ... }
             set_charge (bool): whether or not to set the charge field in Atoms
 
         Returns:
-            [[atom_id, molecule tag, atom_type, charge(if present), x, y, z], ... ]
+            numpy array, [[atom_id, molecule tag, atom_type,
+                charge(if present), x, y, z], ... ]
         """
-        atoms_data = []
-        for i, site in enumerate(structure):
-            atom_type = atomic_masses_dict[site.specie.symbol][0]
-            if set_charge:
-                if hasattr(site, "charge"):
-                    atoms_data.append([i + 1, 1, atom_type, site.charge,
-                                       site.x, site.y, site.z])
-                else:
-                    atoms_data.append([i + 1, 1, atom_type, 0.0,
-                                       site.x, site.y, site.z])
+        natoms = len(structure)
+        atom_types = np.fromiter(
+            (symbol_to_typeid[site.specie.symbol] for site in structure),
+            dtype=np.int64, count=natoms)
+        columns = [np.arange(1, natoms + 1), np.ones(natoms), atom_types]
+        if set_charge:
+            charges = structure.site_properties.get("charge")
+            if charges is None:
+                columns.append(np.zeros(natoms))
             else:
-                atoms_data.append([i + 1, 1, atom_type,
-                                   site.x, site.y, site.z])
+                columns.append([0.0 if q is None else q for q in charges])
+        columns.append(structure.cart_coords)
+        atoms_data = np.column_stack(columns)
         return atoms_data
 
     @staticmethod
-    def set_lines_from_list(lines, block_name, input_list):
+    def write_block(stream, block_name, input_list, fmt=None,
+                    chunk_size=10000):
+        """
+        Write the data block with name 'block_name', i.e. the header followed
+        by the values from the input list, to the stream. If the input is a
+        2D numpy array and the row format is given, the rows are formatted
+        in chunks, with a single string formatting operation per chunk.
+
+        Args:
+            stream (file): file or StringIO stream
+            block_name (string): name of the data block,
+                e.g. 'Atoms', 'Bonds' etc
+            input_list (list/numpy.ndarray): list of values
+            fmt (string): numpy.savetxt format of a row, e.g. "%d %d %.17g"
+            chunk_size (int): number of rows formatted at once
+        """
+        if len(input_list) > 0:
+            stream.write("\n{}\n\n".format(block_name))
+            if fmt and isinstance(input_list, np.ndarray) and \
+                    input_list.ndim == 2:
+                row_fmt = fmt + "\n"
+                for i in range(0, len(input_list), chunk_size):
+                    chunk = input_list[i:i + chunk_size]
+                    stream.write((row_fmt * len(chunk)) %
+                                 tuple(chunk.ravel().tolist()))
+            else:
+                for ad in input_list:
+                    stream.write(" ".join([str(x) for x in ad]) + "\n")
+
+    @staticmethod
+    def set_lines_from_list(lines, block_name, input_list, fmt=None):
         """
         Append the values from the input list that corresponds to the block
         with name 'block_name' to the list of lines.
@@ -172,12 +462,13 @@ class LammpsData(MSONable):
             lines (list)
             block_name (string): name of the data block,
                 e.g. 'Atoms', 'Bonds' etc
-            input_list (list): list of values
+            input_list (list/numpy.ndarray): list of values
+            fmt (string): numpy.savetxt format of a row, e.g. "%d %d %.17g"
         """
-        if input_list:
-            lines.append("\n" + block_name + " \n")
-            for ad in input_list:
-                lines.append(" ".join([str(x) for x in ad]))
+        buf = StringIO()
+        LammpsData.write_block(buf, block_name, input_list, fmt=fmt)
+        if buf.getvalue():
+            lines.append(buf.getvalue().rstrip("\n"))
 
     @staticmethod
     def from_structure(input_structure, box_size, set_charge=True):
@@ -200,12 +491,12 @@ class LammpsData(MSONable):
         if isinstance(input_structure, Structure):
             input_structure = Molecule.from_sites(input_structure.sites)
         box_size = LammpsData.check_box_size(input_structure, box_size)
-        natoms, natom_types, atomic_masses_dict = \
-            LammpsData.get_basic_system_info(input_structure.copy())
+        natoms, natom_types, symbol_to_typeid, atomic_masses = \
+            LammpsData.get_basic_system_info(input_structure)
         atoms_data = LammpsData.get_atoms_data(input_structure,
-                                               atomic_masses_dict,
+                                               symbol_to_typeid,
                                                set_charge=set_charge)
-        return LammpsData(box_size, atomic_masses_dict.values(), atoms_data)
+        return LammpsData(box_size, atomic_masses, atoms_data)
 
     @staticmethod
     def from_file(data_file, read_charge=True):
@@ -225,41 +516,35 @@ class LammpsData(MSONable):
         atomic_masses = []  # atom_type(starts from 1): mass
         box_size = []
         atoms_data = []
-        # atom_id, mol_id, atom_type, charge, x, y, z
-        if read_charge:
-            atoms_pattern = re.compile(
-                "^\s*(\d+)\s+(\d+)\s+(\d+)\s+([0-9eE\.+-]+)\s+("
-                "[0-9eE\.+-]+)\s+([0-9eE\.+-]+)\s+([0-9eE\.+-]+)\w*")
-        # atom_id, mol_id, atom_type, x, y, z
-        else:
-            atoms_pattern = re.compile(
-                "^\s*(\d+)\s+(\d+)\s+(\d+)\s+([0-9eE\.+-]+)\s+("
-                "[0-9eE\.+-]+)\s+([0-9eE\.+-]+)\w*")
-        # atom_type, mass
-        masses_pattern = re.compile("^\s*(\d+)\s+([0-9\.]+)$")
-        box_pattern = re.compile(
-            "^([0-9eE\.+-]+)\s+([0-9eE\.+-]+)\s+[xyz]lo\s+[xyz]hi")
-        with open(data_file) as df:
-            for line in df:
-                if masses_pattern.search(line):
-                    m = masses_pattern.search(line)
-                    atomic_masses.append([int(m.group(1)), float(m.group(2))])
-                if box_pattern.search(line):
-                    m = box_pattern.search(line)
-                    box_size.append([float(m.group(1)), float(m.group(2))])
-                m = atoms_pattern.search(line)
-                if m:
-                    # atom id, mol id, atom type
-                    line_data = [int(i) for i in m.groups()[:3]]
-                    # charge, x, y, z
-                    line_data.extend([float(i) for i in m.groups()[3:]])
-                    atoms_data.append(line_data)
+        # number of atoms and of atom types
+        counts = {}
+        with open(data_file, buffering=_READ_BUFFER_SIZE) as df:
+            # the section bodies are read in bulk right after the header
+            for section in _iter_sections(df, counts, box_size):
+                try:
+                    if section == "masses":
+                        # atom_type, mass
+                        atomic_masses = _read_masses(df, counts["atom types"])
+                    elif section == "atoms":
+                        # atom_id, mol_id, atom_type, charge, x, y, z
+                        # or atom_id, mol_id, atom_type, x, y, z
+                        atoms_data = _read_atoms(
+                            df, counts["atoms"], ncols=7 if read_charge else 6)
+                except ValueError as e:
+                    raise ValueError("Invalid {} section: {}".format(
+                        section, e))
         return LammpsData(box_size, atomic_masses, atoms_data)
 
     def as_dict(self):
         d = MSONable.as_dict(self)
         if hasattr(self, "kwargs"):
             d.update(**self.kwargs)
+        # numpy arrays(atoms data, data read from file, ...) are stored as
+        # json serializable dicts, decoded back to arrays in from_dict
+        encoder = MontyEncoder()
+        for k, v in d.items():
+            if isinstance(v, np.ndarray):
+                d[k] = encoder.default(v)
         return d
 
     @classmethod
@@ -325,61 +610,70 @@ class LammpsForceFieldData(LammpsData):
         self.dihedrals_data = dihedrals_data
         self.imdihedrals_data = imdihedrals_data
 
-    def __str__(self):
+    def _write(self, stream):
         """
-        returns a string of lammps data input file
+        Write the lammps data input file, block by block, to the stream.
+
+        Args:
+            stream (file): file or StringIO stream
         """
-        lines = []
         # title
-        lines.append("Data file generated by pymatgen\n")
+        stream.write("Data file generated by pymatgen\n\n")
 
         # count
-        lines.append("{} atoms".format(self.natoms))
-        lines.append("{} bonds".format(self.nbonds))
-        lines.append("{} angles".format(self.nangles))
+        stream.write("{} atoms\n".format(self.natoms))
+        stream.write("{} bonds\n".format(self.nbonds))
+        stream.write("{} angles\n".format(self.nangles))
         if self.ndih > 0:
-            lines.append("{} dihedrals".format(self.ndih))
+            stream.write("{} dihedrals\n".format(self.ndih))
         if self.nimdihs > 0:
-            lines.append("{} impropers".format(self.nimdihs))
+            stream.write("{} impropers\n".format(self.nimdihs))
 
         # types
-        lines.append("\n{} atom types".format(self.natom_types))
-        lines.append("{} bond types".format(self.nbond_types))
-        lines.append("{} angle types".format(self.nangle_types))
+        stream.write("\n{} atom types\n".format(self.natom_types))
+        stream.write("{} bond types\n".format(self.nbond_types))
+        stream.write("{} angle types\n".format(self.nangle_types))
         if self.ndih > 0:
-            lines.append("{} dihedral types".format(self.ndih_types))
+            stream.write("{} dihedral types\n".format(self.ndih_types))
         if self.nimdihs > 0:
-            lines.append("{} improper types".format(self.nimdih_types))
+            stream.write("{} improper types\n".format(self.nimdih_types))
 
         # box size
-        lines.append("\n{} {} xlo xhi\n{} {} ylo yhi\n{} {} zlo zhi".format(
+        stream.write("\n{} {} xlo xhi\n{} {} ylo yhi\n{} {} zlo zhi\n".format(
             self.box_size[0][0], self.box_size[0][1],
             self.box_size[1][0], self.box_size[1][1],
             self.box_size[2][0], self.box_size[2][1]))
 
         # masses
-        self.set_lines_from_list(lines, "Masses", self.atomic_masses)
+        self.write_block(stream, "Masses", self.atomic_masses)
 
         # coefficients
-        self.set_lines_from_list(lines, "Pair Coeffs", self.pair_coeffs)
-        self.set_lines_from_list(lines, "Bond Coeffs", self.bond_coeffs)
-        self.set_lines_from_list(lines, "Angle Coeffs", self.angle_coeffs)
+        self.write_block(stream, "Pair Coeffs", self.pair_coeffs,
+                         fmt=_get_row_fmt(self.pair_coeffs, 1))
+        self.write_block(stream, "Bond Coeffs", self.bond_coeffs,
+                         fmt=_get_row_fmt(self.bond_coeffs, 1))
+        self.write_block(stream, "Angle Coeffs", self.angle_coeffs,
+                         fmt=_get_row_fmt(self.angle_coeffs, 1))
         if self.ndih > 0:
-            self.set_lines_from_list(lines, "Dihedral Coeffs",
-                                     self.dihedral_coeffs)
+            self.write_block(stream, "Dihedral Coeffs", self.dihedral_coeffs,
+                             fmt=_get_row_fmt(self.dihedral_coeffs, 1))
         if self.nimdihs > 0:
-            self.set_lines_from_list(lines, "Improper Coeffs",
-                                     self.improper_coeffs)
+            self.write_block(stream, "Improper Coeffs", self.improper_coeffs,
+                             fmt=_get_row_fmt(self.improper_coeffs, 1))
 
         # data
-        self.set_lines_from_list(lines, "Atoms", self.atoms_data)
-        self.set_lines_from_list(lines, "Bonds", self.bonds_data)
-        self.set_lines_from_list(lines, "Angles", self.angles_data)
+        self.write_block(stream, "Atoms", self.atoms_data,
+                         fmt=_get_row_fmt(self.atoms_data, 3))
+        self.write_block(stream, "Bonds", self.bonds_data,
+                         fmt=_get_row_fmt(self.bonds_data))
+        self.write_block(stream, "Angles", self.angles_data,
+                         fmt=_get_row_fmt(self.angles_data))
         if self.ndih > 0:
-            self.set_lines_from_list(lines, "Dihedrals", self.dihedrals_data)
+            self.write_block(stream, "Dihedrals", self.dihedrals_data,
+                             fmt=_get_row_fmt(self.dihedrals_data))
         if self.nimdihs > 0:
-            self.set_lines_from_list(lines, "Impropers", self.imdihedrals_data)
-        return '\n'.join(lines)
+            self.write_block(stream, "Impropers", self.imdihedrals_data,
+                             fmt=_get_row_fmt(self.imdihedrals_data))
 
     @staticmethod
     def get_param_coeff(forcefield, param_name):
@@ -397,18 +691,15 @@ class LammpsForceFieldData(LammpsData):
         """
         if hasattr(forcefield, param_name):
             param = getattr(forcefield, param_name)
-            param_coeffs = []
-            param_map = {}
-            if param:
-                for i, item in enumerate(param.items()):
-                    param_coeffs.append([i + 1] + list(item[1]))
-                    param_map[item[0]] = i+1
+            items = list(param.items()) if param else []
+            param_coeffs = [[i + 1] + list(v) for i, (k, v) in enumerate(items)]
+            param_map = {k: i + 1 for i, (k, v) in enumerate(items)}
             return param_coeffs, param_map
         else:
             raise AttributeError
 
     @staticmethod
-    def get_atoms_data(mols, mols_number, molecule, atomic_masses_dict,
+    def get_atoms_data(mols, mols_number, molecule, symbol_to_typeid,
                        topologies, atom_to_mol=None):
         """
         Return the atoms data.
@@ -418,56 +709,68 @@ class LammpsForceFieldData(LammpsData):
             mols_number (list): number of each type of molecule in mols list.
             molecule (Molecule): the molecule assembled from the molecules
                 in the mols list.
+            symbol_to_typeid (dict): { atom symbol : atom type id, ... }
             topologies (list): list of Topology objects, one for each molecule
                 type in mols list
-            atom_to_mol (dict):  maps atom_id --> [mol_type, mol_id,
-                local atom id in the mol with id mol_id]
+            atom_to_mol (dict/numpy.ndarray):  maps atom_id --> [mol_type,
+                mol_id, local atom id in the mol with id mol_id], the ids
+                starting from 0. If not set, it is obtained from mols and
+                mols_number.
 
         Returns:
-            atoms_data: [[atom id, mol type, atom type, charge, x, y, z], ... ]
+            atoms_data: [[atom id, mol id, atom type, charge, x, y, z], ... ],
+                as a float array
             molid_to_atomid: [ [global atom id 1, id 2, ..], ...], the
                 index will be the global mol id
         """
-        atoms_data = []
-        nmols = len(mols)
         # set up map atom_to_mol:
         #   atom_id --> [mol_type, mol_id, local atom id in the mol with id mol id]
         # set up map molid_to_atomid:
         #   gobal molecule id --> [[atom_id1, atom_id2,...], ...]
         # This assumes that the atomic order in the assembled molecule can be
         # obtained from the atomic order in the constituent molecules.
-        if not atom_to_mol:
-            atom_to_mol = {}
+        if atom_to_mol is None:
+            natoms_per_mol = np.array([len(mol) for mol in mols])
+            atom_to_mol = np.column_stack(
+                _get_mol_ids(natoms_per_mol, mols_number))
+            # id of the first atom of each molecule type
+            atom_offsets = np.concatenate(
+                ([0], np.cumsum(natoms_per_mol * np.asarray(mols_number))))
             molid_to_atomid = []
-            shift_ = 0
-            mol_id = 0
-            for mol_type in range(nmols):
-                natoms = len(mols[mol_type])
-                for num_mol_id in range(mols_number[mol_type]):
-                    tmp = []
-                    for mol_atom_id in range(natoms):
-                        atom_id = num_mol_id * natoms + mol_atom_id + shift_
-                        atom_to_mol[atom_id] = [mol_type, mol_id, mol_atom_id]
-                        tmp.append(atom_id)
-                    mol_id += 1
-                    molid_to_atomid.append(tmp)
-                shift_ += len(mols[mol_type]) * mols_number[mol_type]
+            for mol_type, natoms in enumerate(natoms_per_mol):
+                # global atom id = offset + num_mol_id * natoms + mol_atom_id
+                molid_to_atomid.extend(
+                    atom_offsets[mol_type] + np.arange(natoms) +
+                    natoms * np.arange(mols_number[mol_type])[:, None])
+        else:
+            if isinstance(atom_to_mol, dict):
+                atom_to_mol = [atom_to_mol[i] for i in range(len(molecule))]
+            atom_to_mol = np.asarray(atom_to_mol,
+                                     dtype=np.int64).reshape(-1, 3)
+            # atom ids of each molecule, sorted by local atom id
+            order = np.lexsort((atom_to_mol[:, 2], atom_to_mol[:, 1]))
+            bounds = np.searchsorted(atom_to_mol[order, 1],
+                                     np.arange(atom_to_mol[:, 1].max() + 2))
+            molid_to_atomid = [order[b:e]
+                               for b, e in zip(bounds[:-1], bounds[1:])]
         # set atoms data from the molecule assembly consisting of
         # molecules from mols list with their count from mol_number list.
         # atom id, mol id, atom type, charge from topology, x, y, z
-        for i, site in enumerate(molecule):
-            atom_type = atomic_masses_dict[site.specie.symbol][0]
-            # atom_type = molecule.symbol_set.index(site.species_string) + 1
-            atom_id = i + 1
-            mol_type = atom_to_mol[i][0] + 1
-            mol_id = atom_to_mol[i][1] + 1
-            mol_atom_id = atom_to_mol[i][2] + 1
-            charge = 0.0
-            if hasattr(topologies[0], "charges"):
-                if topologies[mol_type - 1].charges:
-                    charge = topologies[mol_type - 1].charges[mol_atom_id - 1]
-            atoms_data.append([atom_id, mol_id, atom_type, charge,
-                               site.x, site.y, site.z])
+        mol_types, mol_ids, local_ids = atom_to_mol.T
+        atom_types = np.fromiter((symbol_to_typeid[site.specie.symbol]
+                                  for site in molecule),
+                                 dtype=np.int64, count=len(molecule))
+        # charges of the atoms, one molecule type at a time
+        charges = np.zeros(len(molecule))
+        for mol_type, topology in enumerate(topologies):
+            type_charges = getattr(topology, "charges", None)
+            if type_charges:
+                in_type = mol_types == mol_type
+                charges[in_type] = np.asarray(
+                    type_charges, dtype=np.float64)[local_ids[in_type]]
+        atoms_data = np.column_stack([np.arange(1, len(molecule) + 1),
+                                      mol_ids + 1, atom_types, charges,
+                                      molecule.cart_coords])
         return atoms_data, molid_to_atomid
 
     @staticmethod
@@ -490,58 +793,76 @@ class LammpsForceFieldData(LammpsData):
                 the index is the global mol id
 
         Returns:
-            [ [parameter id, parameter type, global atom id1, global atom id2, ...], ... ]
+            numpy array, [ [parameter id, parameter type, global atom id1,
+                global atom id2, ...], ... ]
         """
-        param_data = []
+        # no parameters: empty array, as for a section missing in a data file
+        param_data = np.empty((0, 0), dtype=np.int64)
         if hasattr(topologies[0], param_name) and getattr(topologies[0], param_name):
             nmols = len(mols)
-            mol_id = 0
-            skip = 0
-            shift_ = 0
             # set the parameter data using the topology info
             # example: loop over all bonds in the system
             # mol_id --> global molecule id
             # mol_type --> type of molecule
             # mol_param_id --> local parameter id in that molecule
+            # example: the bonds list for each molecule type
+            topo_params = [getattr(topologies[mol_type], param_name)
+                           for mol_type in range(nmols)]
+            nparams = [len(param_obj) for param_obj in topo_params]
+            # map the parameter keys in both directions to their unique id,
+            # e.g. ("c1", "c2") and ("c2", "c1"), the key itself taking
+            # precedence over the reversed one.
+            param_map_full = {tuple(reversed(k)): v
+                              for k, v in param_map.items()}
+            param_map_full.update(param_map)
+            mol_types, mol_ids, mol_param_ids = _get_mol_ids(nparams,
+                                                             mols_number)
+            # the parameters are grouped by molecule type, set the data one
+            # molecule type block at a time.
+            bounds = np.concatenate(
+                ([0], np.cumsum(np.multiply(nparams, mols_number[:nmols]))))
+            # [parameter id, parameter type, global atom ids...] for all the
+            # parameters, allocated once the number of atom ids is known
+            data = None
             for mol_type in range(nmols):
-                param_obj = getattr(topologies[mol_type], param_name)
-                nparams = len(param_obj)
-                for num_mol_id in range(mols_number[mol_type]):
-                    for mol_param_id in range(nparams):
-                        param_id = num_mol_id * nparams + mol_param_id + shift_
-                        # example: get the bonds list for mol_type molecule
-                        param_obj = getattr(topologies[mol_type], param_name)
-                        # connectivity info(local atom ids and type) for the
-                        # parameter with the local id 'mol_param_id'.
-                        # example: single bond = [i, j, bond_type]
-                        param = param_obj[mol_param_id]
-                        param_atomids = []
-                        # loop over local atom ids that constitute the parameter
-                        # for the molecule type, mol_type
-                        # example: single bond = [i,j,bond_label]
-                        for atomid in param[:-1]:
-                            # local atom id to global atom id
-                            global_atom_id = molid_to_atomid[mol_id][atomid]
-                            param_atomids.append(global_atom_id + 1)
-                        param_type = param[-1]
-                        param_type_reversed = tuple(reversed(param_type))
-                        # example: get the unique number id for the bond_type
-                        if param_type in param_map:
-                            key = param_type
-                        elif param_type_reversed in param_map:
-                            key = param_type_reversed
-                        else:
-                            key = None
-                        if key:
-                            param_type_id = param_map[key]
-                            param_data.append(
-                                [param_id + 1 - skip, param_type_id] + param_atomids)
-                        else:
-                            skip += 1
-                            print("{} or {} Not available".format(param_type,
-                                                                  param_type_reversed))
-                    mol_id += 1
-                shift_ += nparams * mols_number[mol_type]
+                start, end = bounds[mol_type], bounds[mol_type + 1]
+                if start == end:
+                    continue
+                param_obj = topo_params[mol_type]
+                # example: get the unique number id for each bond_type in the
+                # molecule, 0 if not available
+                param_type_ids = []
+                for param in param_obj:
+                    param_type_id = param_map_full.get(param[-1])
+                    if param_type_id is None:
+                        param_type_id = 0
+                        print("{} or {} Not available".format(
+                            param[-1], tuple(reversed(param[-1]))))
+                    param_type_ids.append(param_type_id)
+                param_type_ids = np.array(param_type_ids, dtype=np.int64)
+                # connectivity info(local atom ids) for each parameter
+                # example: single bond = [i, j, bond_type] --> [i, j]
+                local_atomids = np.array([param[:-1] for param in param_obj],
+                                         dtype=np.int64)
+                if data is None:
+                    data = np.empty((bounds[-1], 2 + local_atomids.shape[1]),
+                                    dtype=np.int64)
+                # local atom ids to global atom ids
+                block_mol_ids = mol_ids[start:end]
+                block_param_ids = mol_param_ids[start:end]
+                mol_atomids = np.array(
+                    molid_to_atomid[block_mol_ids[0]:block_mol_ids[-1] + 1])
+                data[start:end, 1] = param_type_ids[block_param_ids]
+                data[start:end, 2:] = mol_atomids[
+                    (block_mol_ids - block_mol_ids[0])[:, None],
+                    local_atomids[block_param_ids]] + 1
+            if data is not None:
+                # drop the parameters that are not available
+                available = data[:, 1] > 0
+                if not available.all():
+                    data = data[available]
+                data[:, 0] = np.arange(1, len(data) + 1)
+                param_data = data
         return param_data
 
     @staticmethod
@@ -579,10 +900,10 @@ class LammpsForceFieldData(LammpsData):
             forcefield, "imdihedrals")
         # atoms data, topology used for setting charge if present
         box_size = LammpsForceFieldData.check_box_size(molecule, box_size)
-        natoms, natom_types, atomic_masses_dict = \
-            LammpsData.get_basic_system_info(molecule.copy())
+        natoms, natom_types, symbol_to_typeid, atomic_masses = \
+            LammpsData.get_basic_system_info(molecule)
         atoms_data, molid_to_atomid = LammpsForceFieldData.get_atoms_data(
-            mols, mols_number, molecule, atomic_masses_dict, topologies)
+            mols, mols_number, molecule, symbol_to_typeid, topologies)
         # set the other data from the molecular topologies
         bonds_data = LammpsForceFieldData.get_param_data(
             "bonds", bond_map, mols, mols_number, topologies, molid_to_atomid)
@@ -592,7 +913,7 @@ class LammpsForceFieldData(LammpsData):
             "dihedrals", dihedral_map, mols, mols_number, topologies, molid_to_atomid)
         imdihedrals_data = LammpsForceFieldData.get_param_data(
             "imdihedrals", imdihedral_map, mols, mols_number, topologies, molid_to_atomid)
-        return LammpsForceFieldData(box_size, atomic_masses_dict.values(),
+        return LammpsForceFieldData(box_size, atomic_masses,
                                     pair_coeffs, bond_coeffs,
                                     angle_coeffs, dihedral_coeffs,
                                     improper_coeffs, atoms_data,
@@ -615,124 +936,29 @@ class LammpsForceFieldData(LammpsData):
         Returns:
             LammpsForceFieldData
         """
-        atomic_masses = []  # atom_type(starts from 1): mass
         box_size = []
-        pair_coeffs = []
-        bond_coeffs = []
-        angle_coeffs = []
-        dihedral_coeffs = []
-        improper_coeffs = []
-        atoms_data = []
-        bonds_data = []
-        angles_data = []
-        dihedral_data = []
-        imdihedral_data = []
-        types_pattern = re.compile("^\s*(\d+)\s+([a-zA-Z]+)\s+types$")
-        # atom_id, mol_id, atom_type, charge, x, y, z
-        atoms_pattern = re.compile(
-            "^\s*(\d+)\s+(\d+)\s+(\d+)\s+([0-9eE\.+-]+)\s+("
-            "[0-9eE\.+-]+)\s+([0-9eE\.+-]+)\s+([0-9eE\.+-]+)\w*")
-        masses_pattern = re.compile("^\s*(\d+)\s+([0-9\.]+)$")
-        box_pattern = re.compile(
-            "^\s*([0-9eE\.+-]+)\s+([0-9eE\.+-]+)\s+[xyz]lo\s+[xyz]hi")
-        # id, value1, value2
-        general_coeff_pattern = re.compile("^\s*(\d+)\s+([0-9\.]+)\s+([0-9\.]+)$")
-        # id, type, atom_id1, atom_id2
-        bond_data_pattern = re.compile("^\s*(\d+)\s+(\d+)\s+(\d+)\s+(\d+)\s*$")
-        # id, type, atom_id1, atom_id2, atom_id3
-        angle_data_pattern = re.compile(
-            "^\s*(\d+)\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)\s*$")
-        # id, type, atom_id1, atom_id2, atom_id3, atom_id4
-        dihedral_data_pattern = re.compile(
-            "^\s*(\d+)\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)\s*$")
-        read_pair_coeffs = False
-        read_bond_coeffs = False
-        read_angle_coeffs = False
-        read_dihedral_coeffs = False
-        read_improper_coeffs = False
-        with open(data_file) as df:
-            for line in df:
-                if types_pattern.search(line):
-                    m = types_pattern.search(line)
-                    if m.group(2) == "atom":
-                        natom_types = int(m.group(1))
-                        npair_types = natom_types # i != j skipped
-                    if m.group(2) == "bond":
-                        nbond_types = int(m.group(1))
-                    if m.group(2) == "angle":
-                        nangle_types = int(m.group(1))
-                    if m.group(2) == "dihedral":
-                        ndihedral_types = int(m.group(1))
-                    if m.group(2) == "improper":
-                        nimproper_types = int(m.group(1))
-                if masses_pattern.search(line):
-                    m = masses_pattern.search(line)
-                    atomic_masses.append([int(m.group(1)), float(m.group(2))])
-                if box_pattern.search(line):
-                    m = box_pattern.search(line)
-                    box_size.append([float(m.group(1)), float(m.group(2))])
-                if "Pair Coeffs".lower() in line.lower():
-                    read_pair_coeffs = True
-                    continue
-                if read_pair_coeffs:
-                    tokens = line.split()
-                    if tokens:
-                        pair_coeffs.append([int(tokens[0])] + [float(i) for i in tokens[1:]])
-                        read_pair_coeffs = False if len(pair_coeffs) >= npair_types else True
-                if "Bond Coeffs".lower() in line.lower():
-                    read_bond_coeffs = True
-                    continue
-                if read_bond_coeffs:
-                    m = general_coeff_pattern.search(line)
-                    if m:
-                        bond_coeffs.append(
-                            [int(m.group(1)), float(m.group(2)), float(m.group(3))])
-                        read_bond_coeffs = False if len(bond_coeffs) >= nbond_types else True
-                if "Angle Coeffs".lower() in line.lower():
-                    read_angle_coeffs = True
-                    continue
-                if read_angle_coeffs:
-                    m = general_coeff_pattern.search(line)
-                    if m:
-                        angle_coeffs.append(
-                            [int(m.group(1)), float(m.group(2)), float(m.group(3))])
-                        read_angle_coeffs = False if len(angle_coeffs) >= nangle_types else True
-                if "Dihedral Coeffs".lower() in line.lower():
-                    read_dihedral_coeffs = True
-                    continue
-                if read_dihedral_coeffs:
-                    tokens = line.split()
-                    if tokens:
-                        dihedral_coeffs.append(
-                            [int(tokens[0])] + [float(i) for i in tokens[1:]])
-                        read_dihedral_coeffs = False if len(dihedral_coeffs) >= ndihedral_types else True
-                if "Improper Coeffs".lower() in line.lower():
-                    read_improper_coeffs = True
-                    continue
-                if read_improper_coeffs:
-                    tokens = line.split()
-                    if tokens:
-                        improper_coeffs.append(
-                            [int(tokens[0])] + [float(i) for i in tokens[1:]])
-                        read_improper_coeffs = False if len(improper_coeffs) >= nimproper_types else True
-                if atoms_pattern.search(line):
-                    m = atoms_pattern.search(line)
-                    # atom id, mol id, atom type
-                    line_data = [int(i) for i in m.groups()[:3]]
-                    # charge, x, y, z, vx, vy, vz ...
-                    line_data.extend([float(i) for i in m.groups()[3:]])
-                    atoms_data.append(line_data)
-                if bond_data_pattern.search(line) and atoms_data:
-                    m = bond_data_pattern.search(line)
-                    bonds_data.append([int(i) for i in m.groups()])
-                if angle_data_pattern.search(line) and atoms_data:
-                    m = angle_data_pattern.search(line)
-                    angles_data.append([int(i) for i in m.groups()])
-                if dihedral_data_pattern.search(line) and atoms_data:
-                    m = dihedral_data_pattern.search(line)
-                    dihedral_data.append([int(i) for i in m.groups()])
-        return LammpsForceFieldData(box_size, atomic_masses, pair_coeffs,
-                                    bond_coeffs, angle_coeffs,
-                                    dihedral_coeffs, improper_coeffs,
-                                    atoms_data, bonds_data, angles_data,
-                                    dihedral_data, imdihedral_data)
+        # number of atoms, bonds, ... and of their types
+        counts = {}
+        # section name(lower case) --> section body, empty by default
+        sections = {k: np.empty((0, 0)) for k in _FF_SECTIONS}
+        sections["masses"] = []
+        for k in ["bonds", "angles", "dihedrals", "impropers"]:
+            sections[k] = np.empty((0, 0), dtype=np.int64)
+        with open(data_file, buffering=_READ_BUFFER_SIZE) as df:
+            # the section bodies are read in bulk right after the header
+            for section in _iter_sections(df, counts, box_size):
+                count, handler = _FF_SECTIONS[section]
+                try:
+                    sections[section] = handler(df, counts[count])
+                except ValueError as e:
+                    raise ValueError("Invalid {} section: {}".format(
+                        section, e))
+        return LammpsForceFieldData(box_size, sections["masses"],
+                                    sections["pair coeffs"],
+                                    sections["bond coeffs"],
+                                    sections["angle coeffs"],
+                                    sections["dihedral coeffs"],
+                                    sections["improper coeffs"],
+                                    sections["atoms"], sections["bonds"],
+                                    sections["angles"], sections["dihedrals"],
+                                    sections["impropers"])
@@ -24,11 +24,14 @@ from io import open
 
 import numpy as np
 
+from monty.functools import lazy_property
+
 from pymatgen.core.periodic_table import _pt_data
 from pymatgen.core.structure import Molecule
 from pymatgen.core.lattice import Lattice
 from pymatgen.analysis.diffusion_analyzer import DiffusionAnalyzer
-from pymatgen.io.lammps.data import LammpsData, LammpsForceFieldData
+from pymatgen.io.lammps.data import LammpsData, LammpsForceFieldData, \
+    read_section
 
 __author__ = "Kiran Mathew"
 __email__ = "kmathew@lbl.gov"
@@ -61,11 +64,14 @@ class LammpsRun(object):
 
     def _parse_trajectory(self):
         """
-        parse the trajectory file.
+        parse the trajectory file. The atoms of each timestep are read in
+        bulk, their number being given by the NUMBER OF ATOMS item.
         """
         traj_timesteps = []
+        # one array per timestep
         trajectory = []
         timestep_label = "ITEM: TIMESTEP"
+        natoms_label = "ITEM: NUMBER OF ATOMS"
         # "ITEM: ATOMS id type ...
         traj_label_pattern = re.compile(
             "^\s*ITEM:\s+ATOMS\s+id\s+type\s+([A-Za-z\s]*)")
@@ -73,57 +79,43 @@ class LammpsRun(object):
         # updated below based on the field names in the ITEM: ATOMS line
         # Note: the first 2 fields must be the id and the atom type. There can be
         # arbitrary number of fields after that and they all will be treated as floats.
-        traj_pattern = re.compile(
-            "\s*(\d+)\s+(\d+)\s+([0-9eE\.+-]+)\s+([0-9eE\.+-]+)\s+"
-            "([0-9eE\.+-]+)\s+"
-            "([0-9eE\.+-]+)\s+"
-            "([0-9eE\.+-]+)\s+([0-9eE\.+-]+)\s+(\d+)\s*")
-        parse_timestep = False
+        fields = ["x", "y", "z", "vx", "vy", "vz", "mol"]
+        natoms = self.natoms
         with open(self.trajectory_file) as tf:
             for line in tf:
                 if timestep_label in line:
-                    parse_timestep = True
-                    continue
-                if parse_timestep:
-                    traj_timesteps.append(float(line))
-                    parse_timestep = False
-                if traj_label_pattern.search(line):
-                    fields = traj_label_pattern.search(line).group(1)
-                    fields = fields.split()
-                    # example:- id type x y z vx vy vz mol ...
-                    traj_pattern_string = "\s*(\d+)\s+(\d+)" + "".join(
-                        ["\s+([0-9eE\.+-]+)" for _ in range(len(fields))])
-                    traj_pattern = re.compile(traj_pattern_string)
-                if traj_pattern.search(line):
-                    # first 2 fields must be id and type, the rest of them
-                    # will be casted as floats
-                    m = traj_pattern.search(line)
-                    line_data = []
-                    line_data.append(int(m.group(1)) - 1)
-                    line_data.append(int(m.group(2)))
-                    line_data.extend(
-                        [float(x) for i, x in enumerate(m.groups()) if i + 1 > 2])
-                    trajectory.append(tuple(line_data))
+                    traj_timesteps.append(float(next(tf)))
+                elif natoms_label in line:
+                    natoms = int(next(tf))
+                else:
+                    m = traj_label_pattern.search(line)
+                    if m:
+                        # example:- id type x y z vx vy vz mol ...
+                        fields = m.group(1).split()
+                        step_data = read_section(tf, natoms)
+                        # sorted by atom id
+                        trajectory.append(
+                            step_data[np.argsort(step_data[:, 0],
+                                                 kind="mergesort")])
         traj_dtype = np.dtype([(str('Atoms_id'), np.int64),
                                (str('atom_type'), np.int64)] +
                               [(str(fld), np.float64) for fld in fields])
-        self.trajectory = np.array(trajectory, dtype=traj_dtype)
+        data = np.concatenate(trajectory) if trajectory else \
+            np.empty((0, len(traj_dtype)))
+        self.trajectory = np.empty(len(data), dtype=traj_dtype)
+        # atom ids start from 0
+        self.trajectory[str('Atoms_id')] = data[:, 0] - 1
+        for i, fld in enumerate(traj_dtype.names[1:]):
+            self.trajectory[fld] = data[:, i + 1]
         self.timesteps = np.array(traj_timesteps, dtype=np.float64)
-        for step in range(self.timesteps.size):
-            begin = step * self.natoms
-            end = (step + 1) * self.natoms
-            self.trajectory[begin:end] = np.sort(self.trajectory[begin:end],
-                                                 order=str("Atoms_id"))
 
     def _set_mol_masses_and_charges(self):
         """
         set the charge, mass and the atomic makeup for each molecule
         """
-        mol_config = []  # [ [atom id1, atom id2, ...], ... ]
-        mol_masses = []  # [ [atom mass1, atom mass2, ...], ... ]
-        # mol_charges = []
         unique_atomic_masses = np.array(self.lammps_data.atomic_masses)[:, 1]
-        atoms_data = np.array(self.lammps_data.atoms_data)
+        # columns of the atoms data
+        atoms_data = np.asarray(self.lammps_data.atoms_data)
         mol_ids = atoms_data[:, 1].astype(np.int64)
         atom_ids = atoms_data[:, 0].astype(np.int64)
         unique_mol_ids = np.unique(mol_ids)
@@ -131,51 +123,63 @@ class LammpsRun(object):
         atomic_masses = unique_atomic_masses[atomic_types - 1]
         # atomic_charges = atoms_data[:, 3]
         self.nmols = unique_mol_ids.size
-        for umid in range(self.nmols):
-            mol_config.append(atom_ids[np.where(mol_ids == umid + 1)] - 1)
-            mol_masses.append(atomic_masses[np.where(mol_ids == umid + 1)])
-            # mol_charges.append(np.sum(atomic_charges[np.where(mol_ids == umid+1)]))
-        self.mol_config = np.array(mol_config)
-        self.mol_masses = np.array(mol_masses)
-
-    def _weighted_average(self, mol_id, mol_vector):
+        # group the atoms by molecule, keeping their order within a molecule
+        order = np.argsort(mol_ids, kind="mergesort")
+        bounds = np.searchsorted(mol_ids[order], np.arange(1, self.nmols + 2))
+        # atom ids(starting from 0) and masses of the atoms of the molecules,
+        # grouped by molecule, and the first atom and size of each molecule
+        self._mol_atom_ids = (atom_ids[order] - 1)[bounds[0]:bounds[-1]]
+        self._mol_atom_masses = atomic_masses[order][bounds[0]:bounds[-1]]
+        self._mol_starts = bounds[:-1] - bounds[0]
+        self._mol_sizes = bounds[1:] - bounds[:-1]
+        # [ [atom id1, atom id2, ...], ... ]
+        self.mol_config = np.array(
+            [self._mol_atom_ids[b:b + n]
+             for b, n in zip(self._mol_starts, self._mol_sizes)])
+        # [ [atom mass1, atom mass2, ...], ... ]
+        self.mol_masses = np.array(
+            [self._mol_atom_masses[b:b + n]
+             for b, n in zip(self._mol_starts, self._mol_sizes)])
+
+    def _get_atom_vectors(self, param):
         """
-        Calculate the weighted average of the array comprising of
-        atomic vectors corresponding to the molecule with id mol_id.
+        Returns the atomic vectors of parameter "param" at every time step,
+        the atoms being grouped by molecule as in mol_config.
 
         Args:
-            mol_id (int): molecule id
-            mol_vector (numpy array): array of shape,
-                natoms_in_molecule with id mol_id x 3
+            param (list): the atomic parameter, e.g. ["x", "y", "z"]
 
         Returns:
-            1D numpy array(3 x 1) of weighted averages in x, y, z directions
+            3D numpy array(n_timesteps x natoms x len(param))
         """
-        mol_masses = self.mol_masses[mol_id]
-        return np.array([np.dot(mol_vector[:, dim], mol_masses) / np.sum(mol_masses)
-                         for dim in range(3)])
+        vectors = np.column_stack([self.trajectory[p] for p in param])
+        vectors = vectors.reshape(self.timesteps.size, self.natoms, len(param))
+        return vectors[:, self._mol_atom_ids]
 
-    def _get_mol_vector(self, step, mol_id, param=["x", "y", "z"]):
+    def _weighted_averages(self, vectors):
         """
-        Returns numpy array corresponding to atomic vectors of parameter
-        "param" for the given time step and molecule id
+        Calculate the weighted average of the atomic vectors of each
+        molecule at every time step.
 
         Args:
-            step (int): time step
-            mol_id (int): molecule id
-            param (list): the atomic parameter for which the weighted
-                average is to be computed
+            vectors (numpy array): atomic vectors grouped by molecule, as
+                returned by _get_atom_vectors
 
         Returns:
-            2D numpy array(natoms_in_molecule x 3) of atomic vectors
+            3D numpy array(n_timesteps x nmols x 3)
         """
-        begin = step * self.natoms
-        end = (step + 1) * self.natoms
-        mol_vector_structured = \
-            self.trajectory[begin:end][self.mol_config[mol_id]][param]
-        new_shape = mol_vector_structured.shape + (-1,)
-        mol_vector = mol_vector_structured.view(np.float64).reshape(new_shape)
-        return mol_vector.copy()
+        masses = self._mol_atom_masses
+        # the molecules without atoms are left as nan, reduceat is only run
+        # over the others so that each sum ends at the next molecule
+        non_empty = self._mol_sizes > 0
+        mol_vectors = np.full((vectors.shape[0], self.nmols, vectors.shape[2]),
+                              np.nan)
+        if non_empty.any():
+            starts = self._mol_starts[non_empty]
+            mol_vectors[:, non_empty] = \
+                np.add.reduceat(vectors * masses[:, None], starts, axis=1) / \
+                np.add.reduceat(masses, starts)[:, None]
+        return mol_vectors
 
     # TODO: remove this and use only get_displacements(an order of magnitude faster)
     def get_structures_from_trajectory(self):
@@ -291,7 +295,7 @@ class LammpsRun(object):
         """
         return self.timesteps * self.lammps_log.timestep
 
-    @property
+    @lazy_property
     def mol_trajectory(self):
         """
         Compute the weighted average trajectory of each molecule at each
@@ -300,19 +304,20 @@ class LammpsRun(object):
         Returns:
             2D numpy array ((n_timesteps*mols_number) x 3)
         """
-        traj = []
-        for step in range(self.timesteps.size):
-            tmp_mol = []
-            for mol_id in range(self.nmols):
-                mol_coords = self._get_mol_vector(step, mol_id,
-                                                  param=["x", "y", "z"])
-                # take care of periodic boundary conditions
-                pbc_wrap(mol_coords, self.box_lengths)
-                tmp_mol.append(self._weighted_average(mol_id, mol_coords))
-            traj.append(tmp_mol)
-        return np.array(traj)
-
-    @property
+        coords = self._get_atom_vectors(["x", "y", "z"])
+        # take care of periodic boundary conditions, as in pbc_wrap: the
+        # molecule is wrapped around the x coordinate of its first atom
+        non_empty = self._mol_sizes > 0
+        ref = np.repeat(coords[:, self._mol_starts[non_empty], 0],
+                        self._mol_sizes[non_empty], axis=1)[:, :, None]
+        box_lengths = np.array(self.box_lengths, dtype=np.float64)
+        coords = np.where(coords - ref >= box_lengths / 2,
+                          coords - box_lengths, coords)
+        coords = np.where(coords - ref < -box_lengths / 2,
+                          coords + box_lengths, coords)
+        return self._weighted_averages(coords)
+
+    @lazy_property
     def mol_velocity(self):
         """
          Compute the weighted average velcoity of each molecule at each
@@ -321,15 +326,8 @@ class LammpsRun(object):
          Returns:
             2D numpy array ((n_timesteps*mols_number) x 3)
         """
-        velocity = []
-        for step in range(self.timesteps.size):
-            tmp_mol = []
-            for mol_id in range(self.nmols):
-                mol_velocities = self._get_mol_vector(step, mol_id,
-                                                      param=["vx", "vy", "vz"])
-                tmp_mol.append(self._weighted_average(mol_id, mol_velocities))
-            velocity.append(tmp_mol)
-        return np.array(velocity)
+        return self._weighted_averages(
+            self._get_atom_vectors(["vx", "vy", "vz"]))
 
 
 class LammpsLog(object):
@@ -355,30 +353,37 @@ class LammpsLog(object):
         thermo_pattern = None
         with open(self.log_file, 'r') as logfile:
             for line in logfile:
+                stripped = line.lstrip()
+                # thermodynamic data lines start with a number, the other
+                # lines are not matched against the thermo pattern
+                if thermo_pattern and stripped and \
+                        stripped[0] in "0123456789+-.":
+                    m = thermo_pattern.search(line)
+                    if m:
+                        thermo_data.append(tuple(map(float, m.groups())))
+                        continue
+                # the settings are only read before the thermodynamic data
+                if thermo_data:
+                    continue
                 # timestep, the unit depedns on the 'units' command
                 time = re.search('timestep\s+([0-9]+)', line)
-                if time and not thermo_data:
+                if time:
                     self.timestep = float(time.group(1))
                 # total number md steps
                 steps = re.search('run\s+([0-9]+)', line)
-                if steps and not thermo_data:
+                if steps:
                     self.nmdsteps = int(steps.group(1))
                 # logging interval
                 thermo = re.search('thermo\s+([0-9]+)', line)
-                if thermo and not thermo_data:
+                if thermo:
                     self.interval = float(thermo.group(1))
                 # thermodynamic data, set by the thermo_style command
                 format = re.search('thermo_style.+', line)
-                if format and not thermo_data:
+                if format:
                     fields = format.group().split()[2:]
                     thermo_pattern_string = "\s*([0-9eE\.+-]+)" + "".join(
                         ["\s+([0-9eE\.+-]+)" for _ in range(len(fields) - 1)])
                     thermo_pattern = re.compile(thermo_pattern_string)
-                if thermo_pattern:
-                    if thermo_pattern.search(line):
-                        m = thermo_pattern.search(line)
-                        thermo_data.append(
-                            tuple([float(x) for i, x in enumerate(m.groups())]))
         thermo_data_dtype = np.dtype([(str(fld), np.float64) for fld in fields])
         self.thermo_data = np.array(thermo_data, dtype=thermo_data_dtype)
 
@@ -5,6 +5,7 @@
 from __future__ import division, print_function, unicode_literals, \
     absolute_import
 
+import json
 import os
 import unittest
 
@@ -95,6 +96,58 @@ class TestLammpsData(unittest.TestCase):
         lammps_data = LammpsData.from_file(
             os.path.join(test_dir, "lammps_data.dat"))
         self.assertEqual(str(lammps_data), str(self.lammps_data))
+        # the coordinates round-trip exactly
+        np.testing.assert_array_equal(lammps_data.atoms_data,
+                                      self.lammps_data.atoms_data)
+
+    def test_to_and_from_dict(self):
+        d = json.loads(json.dumps(self.lammps_data.as_dict()))
+        lammps_data = LammpsData.from_dict(d)
+        self.assertIsInstance(lammps_data.atoms_data, np.ndarray)
+        np.testing.assert_array_equal(lammps_data.atoms_data,
+                                      self.lammps_data.atoms_data)
+        self.assertEqual(str(lammps_data), str(self.lammps_data))
+
+    def test_from_lammps_data_file(self):
+        # written by LAMMPS write_data: trailing comments, image flags,
+        # Velocities section
+        lammps_data = LammpsData.from_file(
+            os.path.join(test_dir, "write_data.data"))
+        self.assertEqual(lammps_data.natoms, 8)
+        self.assertEqual(lammps_data.natom_types, 2)
+        np.testing.assert_almost_equal(lammps_data.box_size,
+                                       [[0, 20], [0, 20], [-5, 15]])
+        np.testing.assert_almost_equal(lammps_data.atomic_masses,
+                                       [[1, 12.011], [2, 14.007]])
+        atoms_data = [[1, 1, 1, -0.18, 1.0, 1.0, 1.0],
+                      [2, 1, 2, 0.18, 2.5, 1.0, 1.0],
+                      [3, 1, 2, 0.18, 3.0, 2.4, 1.0],
+                      [4, 1, 1, -0.18, 4.5, 2.4, 1.0],
+                      [5, 2, 1, -0.18, 19.5, 10.0, 10.0],
+                      [6, 2, 2, 0.18, 1.0, 10.0, 10.0],
+                      [7, 2, 2, 0.18, 1.5, 11.4, 10.0],
+                      [8, 2, 1, -0.18, 3.0, 11.4, 10.0]]
+        np.testing.assert_almost_equal(lammps_data.atoms_data, atoms_data,
+                                       decimal=10)
+
+    def test_from_file_commented_counts(self):
+        with open(os.path.join(test_dir, "lammps_data.dat"), "w") as f:
+            f.write("title\n\n2 atoms # two atoms\n1 atom types\n\n"
+                    "0 10 xlo xhi\n0 10 ylo yhi\n0 10 zlo zhi\n\n"
+                    "Masses\n\n1 1.008\n\n"
+                    "Atoms # charge\n\n1 1 1 0.5 1 2 3\n2 1 1 -0.5 4 5 6\n")
+        lammps_data = LammpsData.from_file(
+            os.path.join(test_dir, "lammps_data.dat"))
+        np.testing.assert_almost_equal(lammps_data.atoms_data,
+                                       [[1, 1, 1, 0.5, 1, 2, 3],
+                                        [2, 1, 1, -0.5, 4, 5, 6]])
+
+    def test_from_file_missing_counts(self):
+        with open(os.path.join(test_dir, "lammps_data.dat"), "w") as f:
+            f.write("title\n\n0 10 xlo xhi\n0 10 ylo yhi\n0 10 zlo zhi\n\n"
+                    "Masses\n\n1 1.008\n")
+        self.assertRaises(ValueError, LammpsData.from_file,
+                          os.path.join(test_dir, "lammps_data.dat"))
 
     def tearDown(self):
         for x in ["lammps_data.dat"]:
@@ -5,13 +5,14 @@
 from __future__ import division, print_function, unicode_literals, \
     absolute_import
 
+import json
 import os
 import unittest
 from collections import OrderedDict
 
 import numpy as np
 
-from pymatgen.io.lammps.data import LammpsForceFieldData
+from pymatgen.io.lammps.data import LammpsData, LammpsForceFieldData
 from pymatgen.io.lammps.force_field import ForceField
 from pymatgen.io.lammps.topology import Topology
 from pymatgen.core.structure import Molecule
@@ -90,6 +91,37 @@ class TestLammpsForceFieldData(unittest.TestCase):
             self.assertEqual(len(self.lammps_ff_data_1.dihedrals_data),
                              sum([len(top.dihedrals) * mol_number
                                   for mol_number in self.mols_number]))
+        # no impropers in the topology, still an array
+        for data in [self.lammps_ff_data_1.bonds_data,
+                     self.lammps_ff_data_1.imdihedrals_data]:
+            self.assertIsInstance(data, np.ndarray)
+        self.assertEqual(self.lammps_ff_data_1.imdihedrals_data.size, 0)
+
+    def test_get_atoms_data_atom_to_mol(self):
+        symbol_to_typeid = LammpsData.get_basic_system_info(
+            self.polymer_matrix)[2]
+        atoms_data, molid_to_atomid = LammpsForceFieldData.get_atoms_data(
+            self.molecules, self.mols_number, self.polymer_matrix,
+            symbol_to_typeid, self.topologies)
+        # atom id --> [mol type, mol id, local atom id]
+        atom_to_mol = {}
+        mol_id = 0
+        for mol_type, mol in enumerate(self.molecules):
+            for _ in range(self.mols_number[mol_type]):
+                for local_id in range(len(mol)):
+                    atom_to_mol[len(atom_to_mol)] = [mol_type, mol_id,
+                                                     local_id]
+                mol_id += 1
+        atom_to_mol_array = np.array([atom_to_mol[i]
+                                      for i in range(len(atom_to_mol))])
+        for atom_to_mol in [atom_to_mol, atom_to_mol_array]:
+            atoms_data_2, molid_to_atomid_2 = \
+                LammpsForceFieldData.get_atoms_data(
+                    self.molecules, self.mols_number, self.polymer_matrix,
+                    symbol_to_typeid, self.topologies,
+                    atom_to_mol=atom_to_mol)
+            np.testing.assert_array_equal(atoms_data_2, atoms_data)
+            np.testing.assert_array_equal(molid_to_atomid_2, molid_to_atomid)
 
     def test_to_and_from_file(self):
         self.lammps_ff_data_1.write_data_file(
@@ -106,12 +138,95 @@ class TestLammpsForceFieldData(unittest.TestCase):
                          lammps_ff_data_2.dihedral_coeffs)
         np.testing.assert_almost_equal(self.lammps_ff_data_1.atoms_data,
                                        lammps_ff_data_2.atoms_data, decimal=10)
-        self.assertEqual(self.lammps_ff_data_1.bonds_data,
-                         lammps_ff_data_2.bonds_data)
-        self.assertEqual(self.lammps_ff_data_1.angles_data,
-                         lammps_ff_data_2.angles_data)
-        self.assertEqual(self.lammps_ff_data_1.dihedrals_data,
-                         lammps_ff_data_2.dihedrals_data)
+        np.testing.assert_array_equal(self.lammps_ff_data_1.bonds_data,
+                                      lammps_ff_data_2.bonds_data)
+        np.testing.assert_array_equal(self.lammps_ff_data_1.angles_data,
+                                      lammps_ff_data_2.angles_data)
+        np.testing.assert_array_equal(self.lammps_ff_data_1.dihedrals_data,
+                                      lammps_ff_data_2.dihedrals_data)
+
+    def test_to_and_from_dict(self):
+        for ff_data in [self.lammps_ff_data_1, LammpsForceFieldData.from_file(
+                os.path.join(test_dir, "write_data.data"))]:
+            d = json.loads(json.dumps(ff_data.as_dict()))
+            ff_data_2 = LammpsForceFieldData.from_dict(d)
+            for k in ["pair_coeffs", "bond_coeffs", "angle_coeffs",
+                      "dihedral_coeffs", "improper_coeffs", "atoms_data",
+                      "bonds_data", "angles_data", "dihedrals_data",
+                      "imdihedrals_data"]:
+                # the arrays are restored as arrays
+                self.assertEqual(type(getattr(ff_data_2, k)),
+                                 type(getattr(ff_data, k)))
+                # compared as lists, the empty arrays are restored as 1D
+                self.assertEqual(np.asarray(getattr(ff_data_2, k)).tolist(),
+                                 np.asarray(getattr(ff_data, k)).tolist())
+            self.assertEqual(str(ff_data_2), str(ff_data))
+
+    def test_from_lammps_data_file(self):
+        # written by LAMMPS write_data: styles commented after the section
+        # names, image flags, Velocities section, commented count line
+        ff_data = LammpsForceFieldData.from_file(
+            os.path.join(test_dir, "write_data.data"))
+        self.assertEqual(ff_data.natoms, 8)
+        self.assertEqual(ff_data.nbonds, 6)
+        self.assertEqual(ff_data.nangles, 4)
+        self.assertEqual(ff_data.ndih, 2)
+        self.assertEqual(ff_data.nimdihs, 2)
+        np.testing.assert_almost_equal(ff_data.box_size,
+                                       [[0, 20], [0, 20], [-5, 15]])
+        np.testing.assert_almost_equal(ff_data.atomic_masses,
+                                       [[1, 12.011], [2, 14.007]])
+        np.testing.assert_almost_equal(ff_data.pair_coeffs,
+                                       [[1, 0.066, 3.5], [2, 0.17, 3.25]])
+        np.testing.assert_almost_equal(ff_data.bond_coeffs, [[1, 268, 1.529]])
+        np.testing.assert_almost_equal(ff_data.angle_coeffs,
+                                       [[1, 58.35, 112.7]])
+        np.testing.assert_almost_equal(ff_data.dihedral_coeffs,
+                                       [[1, 1.3, -0.05, 0.2, 0]])
+        np.testing.assert_almost_equal(ff_data.improper_coeffs,
+                                       [[1, 2.5, -1, 2]])
+        # image flags dropped
+        self.assertEqual(ff_data.atoms_data.shape, (8, 7))
+        np.testing.assert_almost_equal(ff_data.atoms_data[4],
+                                       [5, 2, 1, -0.18, 19.5, 10.0, 10.0])
+        np.testing.assert_array_equal(ff_data.bonds_data,
+                                      [[1, 1, 1, 2], [2, 1, 2, 3],
+                                       [3, 1, 3, 4], [4, 1, 5, 6],
+                                       [5, 1, 6, 7], [6, 1, 7, 8]])
+        np.testing.assert_array_equal(ff_data.angles_data,
+                                      [[1, 1, 1, 2, 3], [2, 1, 2, 3, 4],
+                                       [3, 1, 5, 6, 7], [4, 1, 6, 7, 8]])
+        np.testing.assert_array_equal(ff_data.dihedrals_data,
+                                      [[1, 1, 1, 2, 3, 4],
+                                       [2, 1, 5, 6, 7, 8]])
+        np.testing.assert_array_equal(ff_data.imdihedrals_data,
+                                      [[1, 1, 2, 1, 3, 4],
+                                       [2, 1, 6, 5, 7, 8]])
+
+    def _write_coeffs_file(self, pair_coeffs):
+        with open(os.path.join(test_dir, "lammps_ff_data.dat"), "w") as f:
+            f.write("title\n\n1 atoms\n4 atom types\n\n"
+                    "0 10 xlo xhi\n0 10 ylo yhi\n0 10 zlo zhi\n\n"
+                    "Pair Coeffs\n\n" + pair_coeffs + "\n"
+                    "Atoms\n\n1 1 1 0.0 1 2 3\n")
+
+    def test_from_file_ragged_section(self):
+        # optional per-type cutoff on one line only
+        self._write_coeffs_file("1 0.066 3.5\n2 0.17 3.25 10.0 12.0\n"
+                                "3 0.1 3.0 10.0\n4 0.2 3.1 10.0\n")
+        with self.assertRaises(ValueError) as cm:
+            LammpsForceFieldData.from_file(
+                os.path.join(test_dir, "lammps_ff_data.dat"))
+        self.assertIn("pair coeffs", str(cm.exception))
+
+    def test_from_file_non_numeric_section(self):
+        # pair_style hybrid, the sub-style is named on each line
+        self._write_coeffs_file("1 lj/cut 0.066 3.5\n2 lj/cut 0.17 3.25\n"
+                                "3 lj/cut 0.1 3.0\n4 lj/cut 0.2 3.1\n")
+        with self.assertRaises(ValueError) as cm:
+            LammpsForceFieldData.from_file(
+                os.path.join(test_dir, "lammps_ff_data.dat"))
+        self.assertIn("pair coeffs", str(cm.exception))
 
     def tearDown(self):
         for x in ["lammps_ff_data.dat"]:
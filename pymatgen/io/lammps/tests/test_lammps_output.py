@@ -9,7 +9,7 @@ import os
 import unittest
 
 import numpy as np
-from pymatgen.io.lammps.output import LammpsRun
+from pymatgen.io.lammps.output import LammpsRun, pbc_wrap
 
 __author__ = 'Kiran Mathew'
 __email__ = 'kmathew@lbl.gov'
@@ -59,6 +59,58 @@ class TestLammpsOutput(unittest.TestCase):
                                            trajectory_ans[:, i + 1],
                                            decimal=10)
 
+    def test_mol_trajectory_and_velocity(self):
+        run = self.lammpsrun
+        mol_trajectory = run.mol_trajectory
+        mol_velocity = run.mol_velocity
+        self.assertEqual(mol_trajectory.shape,
+                         (run.timesteps.size, run.nmols, 3))
+        self.assertEqual(mol_velocity.shape, mol_trajectory.shape)
+        for step, mol_id in [(0, 0), (41, 100), (run.timesteps.size - 1,
+                                                 run.nmols - 1)]:
+            atoms = run.trajectory[step * run.natoms:(step + 1) * run.natoms]
+            atoms = atoms[run.mol_config[mol_id]]
+            masses = run.mol_masses[mol_id]
+            coords = np.column_stack([atoms[f] for f in ["x", "y", "z"]])
+            pbc_wrap(coords, run.box_lengths)
+            np.testing.assert_almost_equal(
+                mol_trajectory[step, mol_id],
+                np.dot(masses, coords) / np.sum(masses), decimal=10)
+            velocities = np.column_stack([atoms[f]
+                                          for f in ["vx", "vy", "vz"]])
+            np.testing.assert_almost_equal(
+                mol_velocity[step, mol_id],
+                np.dot(masses, velocities) / np.sum(masses), decimal=10)
+
+    def test_mol_trajectory_non_contiguous_mol_ids(self):
+        # no molecule 3, the molecules are the ones with ids 1 to nmols
+        with open(os.path.join(test_dir, "mol_ids.data"), "w") as f:
+            f.write("title\n\n5 atoms\n1 atom types\n\n"
+                    "0 200 xlo xhi\n0 200 ylo yhi\n0 200 zlo zhi\n\n"
+                    "Masses\n\n1 1.0\n\nAtoms\n\n"
+                    "1 1 1 0 1 0 0\n2 1 1 0 3 0 0\n3 2 1 0 10 0 0\n"
+                    "4 2 1 0 20 0 0\n5 4 1 0 99 0 0\n")
+        with open(os.path.join(test_dir, "mol_ids.dump"), "w") as f:
+            f.write("ITEM: TIMESTEP\n0\nITEM: NUMBER OF ATOMS\n5\n"
+                    "ITEM: BOX BOUNDS pp pp pp\n0 200\n0 200\n0 200\n"
+                    "ITEM: ATOMS id type x y z vx vy vz\n"
+                    "1 1 1 0 0 1 0 0\n2 1 3 0 0 3 0 0\n"
+                    "3 1 10 0 0 10 0 0\n4 1 20 0 0 20 0 0\n"
+                    "5 1 99 0 0 99 0 0\n")
+        run = LammpsRun(os.path.join(test_dir, "mol_ids.data"),
+                        os.path.join(test_dir, "mol_ids.dump"),
+                        os.path.join(test_dir, "nvt.log"))
+        self.assertEqual(run.nmols, 3)
+        np.testing.assert_almost_equal(run.mol_trajectory[0, :, 0],
+                                       [2, 15, np.nan])
+        np.testing.assert_almost_equal(run.mol_velocity[0, :, 0],
+                                       [2, 15, np.nan])
+
+    def tearDown(self):
+        for x in ["mol_ids.data", "mol_ids.dump"]:
+            if os.path.exists(os.path.join(test_dir, x)):
+                os.remove(os.path.join(test_dir, x))
+
 
 if __name__ == "__main__":
     unittest.main()